@@ -9,12 +9,450 @@ import pathlib
 import shutil
 import os
 import io
-from typing import List, Tuple
-import difflib
+import mmap
+import re
+import struct
+import contextlib
+import stat
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Tuple
+import hashlib
 import datetime
 
 ALLOWED_SUFFIXES = [".json", ".log", ".lock", ".txt", ".md"]
 MAX_FILE_LIST = 1000
+MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+
+def _walk(root):
+    """Yield (name, path, is_file, is_dir) for every entry under root.
+
+    Uses os.scandir so the type checks come from the cached DirEntry data
+    instead of an extra stat() per path.
+    """
+    with os.scandir(root) as it:
+        for entry in it:
+            is_dir = entry.is_dir(follow_symlinks=False)
+            yield entry.name, entry.path, entry.is_file(follow_symlinks=False), is_dir
+            if is_dir:
+                yield from _walk(entry.path)
+
+
+def _has_suffix(name: str, suffix_set) -> bool:
+    dot = name.rfind(".")
+    return dot >= 0 and name[dot:] in suffix_set
+
+
+def _member_path(root: str, name: str) -> str:
+    """Sanitised filesystem path for archive member name under root (as ZipFile.extract does)."""
+    parts = os.path.splitdrive(name.replace("/", os.sep))[1].split(os.sep)
+    rel = os.sep.join(x for x in parts if x not in ("", os.curdir, os.pardir))
+    return os.path.normpath(os.path.join(root, rel))
+
+
+def extract_candidates(zf: zipfile.ZipFile, root, suffixes) -> Dict[str, zipfile.ZipInfo]:
+    """Recreate the archive's tree under root, writing data only where it may be edited.
+
+    Members with one of the content suffixes are extracted; every other file
+    becomes an empty placeholder so renames still see the full tree. Returns
+    {rel_path: ZipInfo} for every member (the last one wins for duplicate
+    names), so the output step can copy untouched members straight from the
+    archive.
+    """
+    root = str(root)
+    prefix_len = len(os.path.join(root, ""))
+    suffix_set = frozenset(suffixes)
+    members: Dict[str, zipfile.ZipInfo] = {}
+    for info in zf.infolist():
+        path = _member_path(root, info.filename)
+        rel = path[prefix_len:]
+        if not rel:
+            continue
+        if info.is_dir():
+            os.makedirs(path, exist_ok=True)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as dst:
+                if _has_suffix(info.filename, suffix_set):
+                    with zf.open(info) as src:
+                        shutil.copyfileobj(src, dst, length=1 << 20)
+        members.pop(rel, None)
+        members[rel] = info
+    return members
+
+
+def _renamed_rel(rel: str, renamed: Dict[str, str]) -> str:
+    """Where original rel path ends up once the applied renames are taken into account.
+
+    renamed maps the original rel path of each renamed file or folder to its
+    new name; every component of rel is looked up by its original prefix.
+    """
+    parts = rel.split(os.sep)
+    prefix = ""
+    for i, part in enumerate(parts):
+        prefix = os.path.join(prefix, part) if prefix else part
+        parts[i] = renamed.get(prefix, part)
+    return os.sep.join(parts)
+
+
+# _copy_member_raw leans on these zipfile internals; without them it stream-copies
+_RAW_COPY_MODULE_ATTRS = ("structFileHeader", "sizeFileHeader", "stringFileHeader",
+                          "_FH_SIGNATURE", "_FH_FILENAME_LENGTH", "_FH_EXTRA_FIELD_LENGTH")
+_RAW_COPY_ZIPFILE_ATTRS = ("fp", "_lock", "_seekable", "start_dir", "_writecheck", "_didModify")
+
+
+def _copy_member_stream(src_zf: zipfile.ZipFile, member: zipfile.ZipInfo, dst_zf: zipfile.ZipFile, arcname: str) -> None:
+    """Append member to dst_zf as arcname through the public API (decompress, recompress)."""
+    zinfo = zipfile.ZipInfo(arcname, date_time=member.date_time)
+    zinfo.external_attr = member.external_attr
+    zinfo.create_system = member.create_system
+    if member.is_dir():
+        dst_zf.writestr(zinfo, b"")
+        return
+    zinfo.compress_type = dst_zf.compression
+    with dst_zf.open(zinfo, "w", force_zip64=True) as dst, src_zf.open(member) as src:
+        shutil.copyfileobj(src, dst, length=1 << 20)
+
+
+def _copy_member_raw(src_zf: zipfile.ZipFile, member: zipfile.ZipInfo, dst_zf: zipfile.ZipFile, arcname: str) -> None:
+    """Append member to dst_zf as arcname, copying its compressed bytes verbatim.
+
+    zipfile has no public raw-copy API, so this writes the local header the
+    same way ZipFile.write does for directory entries and then copies the
+    payload, skipping the decompress/recompress round-trip entirely. If a
+    Python release drops any of the internals it needs, it falls back to
+    _copy_member_stream.
+    """
+    if not (all(hasattr(zipfile, a) for a in _RAW_COPY_MODULE_ATTRS)
+            and hasattr(src_zf, "fp")
+            and all(hasattr(dst_zf, a) for a in _RAW_COPY_ZIPFILE_ATTRS)):
+        _copy_member_stream(src_zf, member, dst_zf, arcname)
+        return
+    # the local header's name/extra lengths can differ from the central directory's
+    src_fp = src_zf.fp
+    src_fp.seek(member.header_offset)
+    fheader = struct.unpack(zipfile.structFileHeader, src_fp.read(zipfile.sizeFileHeader))
+    if fheader[zipfile._FH_SIGNATURE] != zipfile.stringFileHeader:
+        raise zipfile.BadZipFile(f"Bad local file header for {member.filename}")
+    src_fp.seek(fheader[zipfile._FH_FILENAME_LENGTH] + fheader[zipfile._FH_EXTRA_FIELD_LENGTH], os.SEEK_CUR)
+
+    zinfo = zipfile.ZipInfo(arcname, date_time=member.date_time)
+    zinfo.compress_type = member.compress_type
+    zinfo.flag_bits = member.flag_bits & ~0x08  # sizes go in the local header, no data descriptor
+    zinfo.external_attr = member.external_attr
+    zinfo.CRC = member.CRC
+    zinfo.compress_size = member.compress_size
+    zinfo.file_size = member.file_size
+    zip64 = max(member.file_size, member.compress_size) > zipfile.ZIP64_LIMIT
+
+    with dst_zf._lock:
+        if dst_zf._seekable:
+            dst_zf.fp.seek(dst_zf.start_dir)
+        zinfo.header_offset = dst_zf.fp.tell()
+        dst_zf._writecheck(zinfo)
+        dst_zf._didModify = True
+        dst_zf.fp.write(zinfo.FileHeader(zip64))
+        remaining = member.compress_size
+        while remaining:
+            chunk = src_fp.read(min(remaining, 1 << 20))
+            if not chunk:
+                raise zipfile.BadZipFile(f"Truncated data for {member.filename}")
+            dst_zf.fp.write(chunk)
+            remaining -= len(chunk)
+        dst_zf.filelist.append(zinfo)
+        dst_zf.NameToInfo[zinfo.filename] = zinfo
+        dst_zf.start_dir = dst_zf.fp.tell()
+
+
+def compile_pairs(pairs):
+    """Compile (old, new) pairs into (pattern, mapping) replacers for str and bytes.
+
+    Each pattern is a single alternation of the escaped old values, longest
+    first so an old value that contains another one wins; one scan of the
+    input then handles every pair.
+    """
+    mapping = dict(pairs)
+    str_pat = re.compile("|".join(re.escape(o) for o in sorted(mapping, key=len, reverse=True)))
+    bytes_map = {o.encode("utf-8"): n.encode("utf-8") for o, n in mapping.items()}
+    bytes_pat = re.compile(b"|".join(re.escape(o) for o in sorted(bytes_map, key=len, reverse=True)))
+    return (str_pat, mapping), (bytes_pat, bytes_map)
+
+
+def _contains(rep, value) -> bool:
+    """True if value (str, bytes or mmap) contains any old value of rep."""
+    pat, mapping = rep
+    if len(mapping) == 1:
+        # a lone pair keeps the memchr-backed find instead of the regex engine
+        return value.find(next(iter(mapping))) != -1
+    return pat.search(value) is not None
+
+
+def _sub(rep, value):
+    """Replace every old value of rep in value in a single pass."""
+    pat, mapping = rep
+    if len(mapping) == 1:
+        ((o, n),) = mapping.items()
+        return value.replace(o, n)
+    return pat.sub(lambda m: mapping[m.group()], value)
+
+
+def _file_contains(path, rep) -> bool:
+    """True if the file at path contains any old value of rep.
+
+    The containment test runs over an mmap, so file contents are never
+    copied into a Python bytes object.
+    """
+    try:
+        if os.path.getsize(path) < min(map(len, rep[1])):
+            return False
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+                return _contains(rep, mm)
+        finally:
+            os.close(fd)
+    except Exception:
+        return False
+
+
+def _patch_in_place(path, rep, undo: List[Tuple[int, bytes]]) -> None:
+    """Overwrite each match of the bytes replacer rep in path via os.pwrite.
+
+    Only valid when every pair is the same length. Matches are located over a
+    read-only mmap, so the file is never copied into a bytes object, and all
+    offsets are collected before the first write. Each (offset, old bytes) is
+    appended to undo before it is overwritten, so a failure part-way still
+    leaves an exact undo record.
+    """
+    pat, mapping = rep
+    fd = os.open(path, os.O_RDWR)
+    try:
+        if os.fstat(fd).st_size == 0:
+            return
+        with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+            if len(mapping) == 1:
+                # a lone pair keeps the memchr-backed find, as in _contains
+                o = next(iter(mapping))
+                hits = []
+                off = mm.find(o)
+                while off != -1:
+                    hits.append((off, o))
+                    off = mm.find(o, off + len(o))
+            else:
+                hits = [(m.start(), m.group()) for m in pat.finditer(mm)]
+        for off, o in hits:
+            undo.append((off, o))
+            os.pwrite(fd, mapping[o], off)
+    finally:
+        os.close(fd)
+
+
+def _unpatch(path: str, undo: List[Tuple[int, bytes]]) -> None:
+    """Write back the (offset, old bytes) ranges recorded by _patch_in_place."""
+    fd = os.open(path, os.O_WRONLY)
+    try:
+        for off, old in reversed(undo):
+            os.pwrite(fd, old, off)
+    finally:
+        os.close(fd)
+
+
+def _backup(path: str, backup_dir: str) -> str:
+    """Keep path's current inode alive under a fresh name in backup_dir.
+
+    A hard link costs no copy and survives the os.replace in _write_atomic;
+    where links are unsupported the file is copied instead. Returns the
+    backup path, which os.replace can move straight back on rollback.
+    """
+    fd, backup = tempfile.mkstemp(dir=backup_dir)
+    os.close(fd)
+    os.unlink(backup)
+    try:
+        os.link(path, backup)
+    except OSError:
+        shutil.copy2(path, backup)
+    return backup
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    """Replace path's contents with data via a sibling temp file and os.replace.
+
+    A crash leaves either the old or the new file, never a partial one; the
+    1 MiB buffer keeps write() syscalls few for large files. The temp name
+    comes from mkstemp so it can never clobber a file from the archive.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".", suffix=".tmp")
+    try:
+        with open(fd, "wb", buffering=1 << 20) as fh:
+            fh.write(data)
+        # mkstemp creates 0600; keep the original's permission bits
+        os.chmod(tmp, stat.S_IMODE(os.stat(path).st_mode))
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def _match_diff(text: str, rep, fromfile: str, context: int = 1, max_lines: int = 200) -> str:
+    """Diff-style preview of applying the str replacer rep to text.
+
+    The change is a plain substring replace, so hunks are built straight from
+    the matching lines (plus context lines) instead of running difflib.
+    """
+    lines = text.splitlines()
+    out = [f"--- {fromfile}", f"+++ {fromfile} (updated)"]
+    shown = -1  # index of the last line already emitted
+    for i, line in enumerate(lines):
+        if not _contains(rep, line):
+            continue
+        start = max(i - context, shown + 1)
+        if start > shown + 1:
+            out.append(f"@@ line {start + 1} @@")
+        out.extend(f"  {lines[j]}" for j in range(start, i))
+        out.append(f"- {line}")
+        out.append(f"+ {_sub(rep, line)}")
+        shown = i
+        # trailing context, unless the next line is itself a match
+        for j in range(i + 1, min(i + 1 + context, len(lines))):
+            if _contains(rep, lines[j]):
+                break
+            out.append(f"  {lines[j]}")
+            shown = j
+        if len(out) >= max_lines:
+            out = out[:max_lines] + ["..."]
+            break
+    return "\n".join(out)
+
+
+def _rename_grouped(candidates):
+    """Rename (src, rel, dst_name) candidates, one directory fd per parent.
+
+    Yields (src, rel, dst_name, dst, err) in input order: err is None on
+    success, FileExistsError if the target already exists (nothing renamed),
+    or the exception raised. Where the platform supports dir_fd, each rename
+    is a single renameat() on short names instead of resolving full paths.
+    """
+    # os.lstat itself is never in supports_dir_fd; os.stat(follow_symlinks=False) is the dir_fd-capable form
+    use_fd = os.rename in os.supports_dir_fd and os.stat in os.supports_dir_fd
+    groups = {}
+    for item in candidates:
+        groups.setdefault(os.path.dirname(item[0]), []).append(item)
+
+    for parent, items in groups.items():
+        dfd = None
+        try:
+            if use_fd:
+                dfd = os.open(parent, os.O_RDONLY | os.O_DIRECTORY)
+        except OSError as e:
+            for src, rel, dst_name in items:
+                yield src, rel, dst_name, os.path.join(parent, dst_name), e
+            continue
+        try:
+            for src, rel, dst_name in items:
+                dst = os.path.join(parent, dst_name)
+                src_ref, dst_ref = (os.path.basename(src), dst_name) if dfd is not None else (src, dst)
+                try:
+                    try:
+                        os.stat(dst_ref, dir_fd=dfd, follow_symlinks=False)
+                        yield src, rel, dst_name, dst, FileExistsError(dst)
+                        continue
+                    except FileNotFoundError:
+                        pass
+                    os.rename(src_ref, dst_ref, src_dir_fd=dfd, dst_dir_fd=dfd)
+                    yield src, rel, dst_name, dst, None
+                except Exception as e:
+                    yield src, rel, dst_name, dst, e
+        finally:
+            if dfd is not None:
+                os.close(dfd)
+
+
+def scan_all(root, pairs, suffixes, progress=None) -> Tuple[
+    List[Tuple[str, str]],
+    List[Tuple[str, str, str]],
+    List[Tuple[str, str, str]],
+]:
+    """Collect content, file-rename and folder-rename candidates in one walk.
+
+    Every candidate is its absolute path and its path relative to root,
+    computed once here; rename candidates also carry the new name.
+    All (old, new) pairs are matched together in one pass per name or file,
+    and contents are matched as bytes to skip the UTF-8 decode/encode round-trip.
+    File contents are searched on a thread pool; progress, if given, is called
+    as progress(done, total) while those reads complete.
+    """
+    content_candidates: List[Tuple[str, str]] = []
+    file_rename_candidates: List[Tuple[str, str, str]] = []
+    folder_rename_candidates: List[Tuple[str, str, str]] = []
+
+    content_paths: List[str] = []
+
+    # an empty old matches everywhere and old == new rewrites files to themselves
+    pairs = [(o, n) for o, n in pairs if o and o != n]
+    if not pairs:
+        return content_candidates, file_rename_candidates, folder_rename_candidates
+
+    str_rep, bytes_rep = compile_pairs(pairs)
+    suffix_set = frozenset(suffixes)
+    prefix_len = len(os.path.join(root, ""))
+    for name, path, is_file, is_dir in _walk(root):
+        # file names / folder names
+        if _contains(str_rep, name):
+            if is_file:
+                file_rename_candidates.append((path, path[prefix_len:], _sub(str_rep, name)))
+            elif is_dir:
+                folder_rename_candidates.append((path, path[prefix_len:], _sub(str_rep, name)))
+        # content matches
+        if is_file and _has_suffix(name, suffix_set):
+            content_paths.append(path)
+
+    # content matches are I/O-bound, so read them concurrently and restore walk order after
+    results = [False] * len(content_paths)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        futures = {pool.submit(_file_contains, path, bytes_rep): i for i, path in enumerate(content_paths)}
+        for done, fut in enumerate(as_completed(futures), 1):
+            results[futures[fut]] = fut.result()
+            if progress is not None:
+                progress(done, len(content_paths))
+    for path, found in zip(content_paths, results):
+        if found:
+            content_candidates.append((path, path[prefix_len:]))
+
+    return content_candidates, file_rename_candidates, folder_rename_candidates
+
+
+def _show_lines(lines: List[str]) -> None:
+    """Render lines as a single st.code block, clipped to MAX_FILE_LIST.
+
+    One element instead of one per line keeps large previews from freezing the browser.
+    """
+    shown = lines[:MAX_FILE_LIST]
+    if len(lines) > MAX_FILE_LIST:
+        shown.append(f"... and {len(lines) - MAX_FILE_LIST} more")
+    st.code("\n".join(shown), language=None)
+
+
+def scan_upload(upload_key: str, root, pairs, suffixes, progress=None):
+    """scan_all() memoised in st.session_state across reruns of the same upload.
+
+    Every rerun extracts into a fresh temp dir, so the result is keyed on a
+    digest of the upload rather than on root. Only relative paths (and new
+    names) are kept, re-anchored onto the current root on each rerun; file
+    contents are read again when they are needed.
+    """
+    key = (upload_key, tuple(pairs), tuple(suffixes))
+    cached = st.session_state.get("scan")
+    if cached is None or cached[0] != key:
+        result = scan_all(root, pairs, suffixes, progress=progress)
+        cached = (key, tuple([c[1:] for c in candidates] for candidates in result))
+        st.session_state["scan"] = cached
+    root = str(root)
+    return tuple(
+        [(os.path.join(root, rel), rel, *rest) for rel, *rest in candidates]
+        for candidates in cached[1]
+    )
+
 
 st.set_page_config(page_title="Bulk Replace — Upload & Edit", layout="centered")
 st.title("Bulk Replace — upload, preview, apply, download")
@@ -22,8 +460,8 @@ st.title("Bulk Replace — upload, preview, apply, download")
 st.markdown("""
 Upload a **zip** file containing a folder (or files). The app will:
 
-1. Extract the zip into a temporary workspace.
-2. Scan filenames, foldernames and file contents for the `old` substring (only certain suffixes).
+1. Unpack the zip's folder structure into a temporary workspace (only files with the selected suffixes are actually extracted).
+2. Scan filenames, foldernames and file contents for the `old` substring(s) (only certain suffixes).
 3. Show a preview (diffs and planned renames). You can pick which matches to apply.
 4. When you confirm, the app will perform the renames/edits and provide a download of the modified zip.
 
@@ -38,51 +476,84 @@ if not uploaded:
 old = st.text_input("Old substring to replace", value="old-name-you-want-to-change")
 new = st.text_input("New substring", value="new-name")
 
+extra_pairs = st.text_area(
+    "More replacements (optional, one `old => new` per line)",
+    value="",
+    help="Only the single space on each side of `=>` is dropped; any other whitespace is part of the value.",
+)
+
 if not old:
     st.error("Please enter the 'old' substring to search for.")
     st.stop()
 
+pairs: List[Tuple[str, str]] = [(old, new)]
+for ln in extra_pairs.splitlines():
+    if not ln.strip():
+        continue
+    o, sep, n = ln.partition("=>")
+    # drop just the padding around the arrow so leading/trailing spaces stay replaceable
+    o = o[:-1] if o.endswith(" ") else o
+    n = n[1:] if n.startswith(" ") else n
+    if not sep or not o:
+        st.error(f"Could not parse replacement line (expected `old => new`): {ln}")
+        st.stop()
+    pairs.append((o, n))
+
+seen = set()
+for o, _ in pairs:
+    if o in seen:
+        # dict(pairs) would silently keep only the last mapping
+        st.error(f"Old value listed more than once: {o!r}")
+        st.stop()
+    seen.add(o)
+
+pairs = [(o, n) for o, n in pairs if o != n]
+if not pairs:
+    st.info("No-op (old equals new); skipping scan.")
+    st.stop()
+
+# compiled once; all pairs are matched in a single pass over each name/file
+str_rep, bytes_rep = compile_pairs(pairs)
+same_length = all(len(o) == len(n) for o, n in bytes_rep[1].items()) and hasattr(os, "pwrite")
+
 # options
 suffixes = st.multiselect("File suffixes to scan/replace in contents", ALLOWED_SUFFIXES, default=ALLOWED_SUFFIXES)
 show_diffs = st.checkbox("Show diffs for content changes", value=True)
+zip_mode = st.radio(
+    "Output zip",
+    ["Fast (no compression)", "Compressed"],
+    horizontal=True,
+    help="Applies to edited files; untouched files are copied with their original compression. "
+    "Storing uncompressed makes building the download much faster; compression only shrinks it.",
+)
+zip_compression = zipfile.ZIP_STORED if zip_mode.startswith("Fast") else zipfile.ZIP_DEFLATED
 
 # Work in a temp dir
-with tempfile.TemporaryDirectory() as tmpdir:
+# the ExitStack closes the source zip on every exit, including each st.stop()
+with tempfile.TemporaryDirectory() as tmpdir, contextlib.ExitStack() as stack:
     tmpdir = pathlib.Path(tmpdir)
-    upload_path = tmpdir / "upload.zip"
-    with open(upload_path, "wb") as f:
-        f.write(uploaded.getbuffer())
-
     extract_dir = tmpdir / "extracted"
     extract_dir.mkdir()
     try:
-        with zipfile.ZipFile(upload_path, "r") as zf:
-            zf.extractall(extract_dir)
+        # kept open: untouched members are copied from it into the output zip
+        src_zf = stack.enter_context(zipfile.ZipFile(uploaded, "r"))
     except zipfile.BadZipFile:
         st.error("Uploaded file is not a valid ZIP archive.")
         st.stop()
+    encrypted = [i.filename for i in src_zf.infolist() if i.flag_bits & 0x1]
+    if encrypted:
+        st.error(f"Password-protected archives are not supported ({len(encrypted)} encrypted entries, e.g. {encrypted[0]}).")
+        st.stop()
+    members = extract_candidates(src_zf, extract_dir, suffixes)
 
     # Gather candidates
-    content_candidates: List[pathlib.Path] = []
-    file_rename_candidates: List[Tuple[pathlib.Path, pathlib.Path]] = []
-    folder_rename_candidates: List[Tuple[pathlib.Path, pathlib.Path]] = []
-
-    for p in extract_dir.rglob("*"):
-        # skip overly large enumerations
-        # file names / folder names
-        if old in p.name:
-            if p.is_file():
-                file_rename_candidates.append((p, p.with_name(p.name.replace(old, new))))
-            elif p.is_dir():
-                folder_rename_candidates.append((p, p.with_name(p.name.replace(old, new))))
-        # content matches
-        if p.is_file() and p.suffix in suffixes:
-            try:
-                txt = p.read_text(encoding="utf-8")
-            except Exception:
-                continue
-            if old in txt:
-                content_candidates.append(p)
+    scan_bar = st.progress(0.0, text="Scanning file contents...")
+    upload_key = hashlib.blake2b(uploaded.getbuffer(), digest_size=16).hexdigest()
+    content_candidates, file_rename_candidates, folder_rename_candidates = scan_upload(
+        upload_key, extract_dir, pairs, suffixes,
+        progress=lambda done, total: scan_bar.progress(done / total, text=f"Scanned {done}/{total} files"),
+    )
+    scan_bar.empty()
 
     st.markdown("### Preview")
     c1, c2, c3 = st.columns(3)
@@ -92,31 +563,24 @@ with tempfile.TemporaryDirectory() as tmpdir:
 
     if len(folder_rename_candidates) > 0:
         with st.expander("Folders that will be renamed"):
-            for src, dst in sorted(folder_rename_candidates, key=lambda x: -len(str(x[0]))):
-                st.write(f"{src.relative_to(extract_dir)}  ->  {dst.name}")
+            _show_lines([
+                f"{rel}  ->  {dst_name}"
+                for _, rel, dst_name in sorted(folder_rename_candidates, key=lambda x: -x[0].count(os.sep))
+            ])
 
     if len(file_rename_candidates) > 0:
         with st.expander("Files that will be renamed"):
-            for src, dst in sorted(file_rename_candidates, key=lambda x: -len(str(x[0]))):
-                st.write(f"{src.relative_to(extract_dir)}  ->  {dst.name}")
+            _show_lines([
+                f"{rel}  ->  {dst_name}"
+                for _, rel, dst_name in sorted(file_rename_candidates, key=lambda x: -x[0].count(os.sep))
+            ])
 
     if len(content_candidates) > 0 and show_diffs:
         with st.expander("Content diffs (first 200 lines per file)"):
-            for fpath in content_candidates[:MAX_FILE_LIST]:
-                try:
-                    old_text = fpath.read_text(encoding="utf-8")
-                except Exception:
-                    continue
-                new_text = old_text.replace(old, new)
-                # show a short unified diff
-                diff = difflib.unified_diff(
-                    old_text.splitlines(keepends=True)[:200],
-                    new_text.splitlines(keepends=True)[:200],
-                    fromfile=str(fpath.relative_to(extract_dir)),
-                    tofile=str(fpath.relative_to(extract_dir)) + " (updated)",
-                    lineterm=""
-                )
-                st.text_area(str(fpath.relative_to(extract_dir)), value=''.join(diff), height=200)
+            for path, rel in content_candidates[:MAX_FILE_LIST]:
+                with open(path, "rb") as fh:
+                    old_text = fh.read().decode("utf-8", errors="replace")
+                st.text_area(rel, value=_match_diff(old_text, str_rep, rel), height=200)
 
     # Allow user to select which operations to perform
     st.markdown("### Select changes to apply")
@@ -130,6 +594,8 @@ with tempfile.TemporaryDirectory() as tmpdir:
         do_rename_folders = st.checkbox(f"Apply folder renames ({len(folder_rename_candidates)})", value=True)
     if len(content_candidates) > 0:
         do_change_contents = st.checkbox(f"Apply content replacements ({len(content_candidates)})", value=True)
+        if same_length:
+            st.caption("Fast-path same-length replace: every old/new pair is the same length, so matches are located over a read-only mmap and only those bytes are rewritten in place.")
 
     confirm_word = st.text_input("Type APPLY to enable the Apply button (case-sensitive)")
     apply_button = st.button("Apply changes and produce download", disabled=(confirm_word != "APPLY"))
@@ -138,83 +604,138 @@ with tempfile.TemporaryDirectory() as tmpdir:
         st.info("Type APPLY and press the button to perform the selected operations.")
         st.stop()
 
-    # Perform operations in a new workspace so we don't mutate while iterating
-    work_dir = tmpdir / "work"
-    shutil.copytree(extract_dir, work_dir)
+    # We own extract_dir, so mutate it in place and journal how to undo each step
+    work_dir = str(extract_dir)
+    # backups live outside work_dir so folder renames never move them
+    undo_dir = tmpdir / "undo"
+    undo_dir.mkdir()
+    # (path, backup path) for rewritten files, (path, [(offset, old bytes)]) for patched ones
+    undo_contents: List[Tuple[str, object]] = []
+    undo_renames: List[Tuple[str, str]] = []
+    # what the output zip needs: rel paths whose bytes changed, and original rel -> new name
+    edited = set()
+    renamed: Dict[str, str] = {}
 
     log_lines: List[str] = []
 
-    # Rename files (deepest first)
-    if do_rename_files:
-        files_sorted = sorted([p for p, _ in file_rename_candidates], key=lambda x: -len(str(x)))
-        for src in files_sorted:
-            rel = src.relative_to(extract_dir)
-            dst_name = src.name.replace(old, new)
-            dst = work_dir.joinpath(rel.parent) / dst_name
-            try:
-                dst_parent = dst.parent
-                dst_parent.mkdir(parents=True, exist_ok=True)
-                src_work = work_dir.joinpath(rel)
-                if dst.exists():
-                    log_lines.append(f"SKIP rename (target exists): {rel} -> {dst_name}")
-                    continue
-                src_work.rename(dst)
-                log_lines.append(f"RENAMED FILE: {rel} -> {dst_name}")
-            except Exception as e:
-                log_lines.append(f"ERROR renaming {rel}: {e}")
-
-    # Rename folders (deepest first)
-    if do_rename_folders:
-        folders_sorted = sorted([p for p, _ in folder_rename_candidates], key=lambda x: -len(str(x)))
-        for src in folders_sorted:
-            rel = src.relative_to(extract_dir)
-            dst_name = src.name.replace(old, new)
-            src_work = work_dir.joinpath(rel)
-            dst = src_work.parent / dst_name
-            try:
-                if dst.exists():
-                    log_lines.append(f"SKIP folder rename (target exists): {rel} -> {dst_name}")
-                    continue
-                src_work.rename(dst)
-                log_lines.append(f"RENAMED FOLDER: {rel} -> {dst_name}")
-            except Exception as e:
-                log_lines.append(f"ERROR renaming folder {rel}: {e}")
-
-    # Apply content replacements
-    changed = 0
-    if do_change_contents:
-        for f in work_dir.rglob("*"):
-            if f.is_file() and f.suffix in suffixes:
+    try:
+        # Apply content replacements first, while paths still match the scan
+        changed = 0
+        if do_change_contents:
+            def _write_one(item):
+                # returns (undo record, error); the record is a backup path or the
+                # patched ranges, never the file's bytes
+                src, rel = item
+                undo = None
                 try:
-                    text = f.read_text(encoding="utf-8")
-                except Exception:
-                    continue
-                if old in text:
-                    try:
-                        f.write_text(text.replace(old, new), encoding="utf-8")
+                    if same_length:
+                        undo = []
+                        _patch_in_place(src, bytes_rep, undo)
+                    else:
+                        with open(src, "rb") as fh:
+                            data = fh.read()
+                        undo = _backup(src, str(undo_dir))
+                        _write_atomic(src, _sub(bytes_rep, data))
+                    return undo, None
+                except Exception as e:
+                    return undo or None, e
+
+            first_error = None
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+                for (src, rel), (undo, err) in zip(content_candidates, pool.map(_write_one, content_candidates)):
+                    if undo is not None:
+                        # journal even on error: a failed pwrite may have patched part of the file
+                        undo_contents.append((src, undo))
+                    if err is None:
+                        edited.add(rel)
                         changed += 1
-                        log_lines.append(f"UPDATED CONTENT: {f.relative_to(work_dir)}")
-                    except Exception as e:
-                        log_lines.append(f"ERROR updating {f.relative_to(work_dir)}: {e}")
-
-    log_lines.append(f"TOTAL content files updated: {changed}")
+                        log_lines.append(f"UPDATED CONTENT: {rel}")
+                    else:
+                        log_lines.append(f"ERROR updating {rel}: {err}")
+                        first_error = first_error or RuntimeError(f"updating {rel}: {err}")
+            if first_error is not None:
+                raise first_error
+
+        # Rename files (deepest first)
+        if do_rename_files:
+            files_sorted = sorted(file_rename_candidates, key=lambda x: -x[0].count(os.sep))
+            for src, rel, dst_name, dst, err in _rename_grouped(files_sorted):
+                if err is None:
+                    undo_renames.append((dst, src))
+                    renamed[rel] = dst_name
+                    log_lines.append(f"RENAMED FILE: {rel} -> {dst_name}")
+                elif isinstance(err, FileExistsError):
+                    log_lines.append(f"SKIP rename (target exists): {rel} -> {dst_name}")
+                else:
+                    log_lines.append(f"ERROR renaming {rel}: {err}")
+                    raise RuntimeError(f"renaming {rel}: {err}") from err
+
+        # Rename folders (deepest first)
+        if do_rename_folders:
+            folders_sorted = sorted(folder_rename_candidates, key=lambda x: -x[0].count(os.sep))
+            for src, rel, dst_name, dst, err in _rename_grouped(folders_sorted):
+                if err is None:
+                    undo_renames.append((dst, src))
+                    renamed[rel] = dst_name
+                    log_lines.append(f"RENAMED FOLDER: {rel} -> {dst_name}")
+                elif isinstance(err, FileExistsError):
+                    log_lines.append(f"SKIP folder rename (target exists): {rel} -> {dst_name}")
+                else:
+                    log_lines.append(f"ERROR renaming folder {rel}: {err}")
+                    raise RuntimeError(f"renaming folder {rel}: {err}") from err
+    except Exception as e:
+        # roll back renames newest first, then restore original contents at their old paths;
+        # keep going past individual failures so as much as possible is undone
+        rollback_errors: List[str] = []
+        for dst, src in reversed(undo_renames):
+            try:
+                os.replace(dst, src)
+            except Exception as undo_err:
+                rollback_errors.append(f"ERROR undoing rename {dst} -> {src}: {undo_err}")
+        for path, undo in reversed(undo_contents):
+            try:
+                if isinstance(undo, str):
+                    os.replace(undo, path)
+                else:
+                    _unpatch(path, undo)
+            except Exception as undo_err:
+                rollback_errors.append(f"ERROR restoring {path}: {undo_err}")
+        if rollback_errors:
+            st.error(f"Applying changes failed ({e}) and the rollback was incomplete; no download is offered.")
+            # shown on their own so a long operation log can never clip them
+            st.code("\n".join(rollback_errors), language=None)
+        else:
+            st.error(f"Applying changes failed and was rolled back: {e}")
+        with st.expander("Operation log", expanded=True):
+            _show_lines(log_lines)
+        st.stop()
 
     # Create output zip
     out_ts = datetime.datetime.utcnow().strftime("%Y%m%d_%H%M%S")
     out_name = f"modified_{out_ts}.zip"
-    out_path = tmpdir / out_name
-    with zipfile.ZipFile(out_path, "w", zipfile.ZIP_DEFLATED) as zf:
-        for p in work_dir.rglob("*"):
-            zf.write(p, arcname=str(p.relative_to(work_dir)))
-
-    st.success("Operations completed — download the modified zip below")
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zip_compression) as zf:
+        for rel, member in members.items():
+            arc = _renamed_rel(rel, renamed)
+            if rel not in edited:
+                # unchanged (or placeholder): copy the original compressed bytes under its current name
+                _copy_member_raw(src_zf, member, zf, arc + "/" if member.is_dir() else arc)
+                continue
+            # keep the source entry's timestamp and attributes; only name and bytes change.
+            # Stream in 1 MiB chunks so large files never sit in memory whole
+            path = os.path.join(work_dir, arc)
+            info = zipfile.ZipInfo(arc, date_time=member.date_time)
+            info.external_attr = member.external_attr
+            info.create_system = member.create_system
+            info.compress_type = zip_compression
+            with zf.open(info, "w", force_zip64=True) as dst, open(path, "rb") as src:
+                shutil.copyfileobj(src, dst, length=1 << 20)
+
+    st.success(f"Operations completed — {changed} content file(s) updated; download the modified zip below")
     with st.expander("Operation log", expanded=True):
-        for ln in log_lines:
-            st.text(ln)
+        _show_lines(log_lines)
 
     # Offer download
-    with open(out_path, "rb") as fh:
-        data = fh.read()
-    st.download_button("Download modified ZIP", data=data, file_name=out_name, mime="application/zip")
+    st.download_button("Download modified ZIP", data=buf.getvalue(), file_name=out_name, mime="application/zip")
 
     st.info("Done. You can repeat the flow with another upload. Remember this app modifies only the uploaded archive on the server-side workspace.")